@@ -0,0 +1,128 @@
+# admission.py
+# Admission control for the Discover India application
+# When the site is overloaded it is better to answer some requests instantly
+# with "503 Service Unavailable" than to let every request wait in a queue.
+# Cheap requests (static files, cached pages, 304s) are shed last.
+
+import os
+import threading
+import time
+
+from werkzeug.wsgi import ClosingIterator
+
+from caching import SharedCounters
+
+
+def parse_request_start(value, now):
+    """
+    Parse an X-Request-Start header set by a front proxy, such as
+    "t=1700000000.123" (seconds) or "t=1700000000123456" (microseconds).
+    Returns the start time in seconds, or None if it cannot be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        start = float(value)
+    except ValueError:
+        return None
+    # Scale milliseconds / microseconds / nanoseconds down to seconds
+    while start > now * 10:
+        start /= 1000.0
+    return start
+
+
+class AdmissionController:
+    """
+    WSGI middleware that limits concurrent work and sheds load.
+
+    Two signals are used:
+    - in-flight requests in this worker (matters for threaded workers)
+    - queue wait, from the X-Request-Start header added by a front proxy
+
+    Full renders are rejected once either signal passes its limit. Cheap
+    requests (decided by the is_cheap callback) are allowed up to
+    cheap_factor times the limits before they are rejected too.
+
+    The in-flight signal needs threaded workers (see gunicorn.conf.py). A
+    request stays in flight until the server closes its response, so code
+    that calls the app in-process (e.g. with app.test_client()) must close
+    every response or it will end up being shed.
+    """
+
+    COUNTERS = ('admitted', 'admitted_cheap', 'shed', 'shed_cheap')
+
+    def __init__(self, wsgi_app, is_cheap, stats_dir, max_in_flight=8, max_queue_wait=1.0,
+                 retry_after=2, cheap_factor=2):
+        self.wsgi_app = wsgi_app
+        self.is_cheap = is_cheap
+        self.max_in_flight = max_in_flight
+        self.max_queue_wait = max_queue_wait
+        self.retry_after = retry_after
+        self.cheap_factor = cheap_factor
+
+        self.counters = SharedCounters(os.path.join(stats_dir, 'stats.bin'), self.COUNTERS)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        # Exponentially weighted average of the queue wait, in seconds
+        self.queue_wait_avg = 0.0
+
+    def _shed(self, start_response, cheap):
+        """Reject the request with a fast 503 and a Retry-After hint"""
+        self.counters.add('shed_cheap' if cheap else 'shed')
+        body = b'Service temporarily overloaded, please retry shortly.\n'
+        start_response('503 Service Unavailable', [
+            ('Content-Type', 'text/plain; charset=utf-8'),
+            ('Content-Length', str(len(body))),
+            ('Retry-After', str(self.retry_after)),
+            ('Cache-Control', 'no-store'),
+        ])
+        return [body]
+
+    def _finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def __call__(self, environ, start_response):
+        now = time.time()
+        started = parse_request_start(environ.get('HTTP_X_REQUEST_START'), now)
+        queue_wait = max(now - started, 0.0) if started else 0.0
+
+        cheap = self.is_cheap(environ)
+        factor = self.cheap_factor if cheap else 1
+
+        with self._lock:
+            if started:
+                self.queue_wait_avg = 0.9 * self.queue_wait_avg + 0.1 * queue_wait
+            overloaded = (self.in_flight >= self.max_in_flight * factor or
+                          queue_wait > self.max_queue_wait * factor)
+            if not overloaded:
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        if overloaded:
+            return self._shed(start_response, cheap)
+
+        self.counters.add('admitted_cheap' if cheap else 'admitted')
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self._finished()
+            raise
+        # The request stays in flight until its body has been sent
+        return ClosingIterator(app_iter, [self._finished])
+
+    def stats(self):
+        """Return admission counters and the current state of this worker"""
+        stats = self.counters.snapshot()
+        stats.update(
+            in_flight=self.in_flight,
+            peak_in_flight=self.peak_in_flight,
+            queue_wait_avg_ms=round(self.queue_wait_avg * 1000, 2),
+            max_in_flight=self.max_in_flight,
+            max_queue_wait_ms=int(self.max_queue_wait * 1000),
+        )
+        return stats
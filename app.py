@@ -3,11 +3,37 @@
 # This application uses Flask-SQLAlchemy for database operations and serves as a travel/cultural guide
 
 # Import necessary Flask modules and extensions
-from flask import Flask, render_template, url_for, g
+from flask import Flask, render_template, url_for, g, request, jsonify, Response, abort, stream_with_context, send_from_directory
+from flask.cli import AppGroup
 from flask_sqlalchemy import SQLAlchemy
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+from urllib.parse import unquote
+from xml.sax.saxutils import escape as xml_escape
 
+from datetime import datetime, timezone
+import click
+import functools
+import hashlib
+import json
+import math
 import os
 
+# Shared on-disk caches and request coalescing for rendered HTML
+from caching import FragmentCache, SingleFlight
+
+# On-demand request profiling
+from profiling import CAPTURE_FILES, PROFILING_ENVIRON_KEY, TOKEN_PARAM, ProfileStore, ProfilingMiddleware, check_token, issue_token
+
+# Load shedding when the site is overloaded
+from admission import AdmissionController
+
+# Static files served in front of Flask
+from static_server import StaticFiles
+
+# Page-weight audit used by the `flask assets audit` command
+from asset_audit import audit_pages, find_oversized_images, find_suspicious_names, find_unreferenced_images
+
 # Create the Flask application instance
 # This is the core of our web application
 app = Flask(__name__, static_url_path='/static')
@@ -37,6 +63,68 @@ else:
     app.config['PREFERRED_URL_SCHEME'] = 'http'
     app.config['APPLICATION_ROOT'] = '/'
 
+# Fragment cache configuration
+# Rendered card sliders are cached on disk so every gunicorn worker shares them
+app.config['FRAGMENT_CACHE_DIR'] = os.environ.get(
+    'FRAGMENT_CACHE_DIR', os.path.join(app.instance_path, 'fragment_cache'))
+# Maximum size of the fragment cache before old fragments are evicted (16 MB)
+app.config['FRAGMENT_CACHE_MAX_BYTES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+# Page cache configuration
+# Whole rendered pages are cached the same way, keyed by route and content version
+app.config['PAGE_CACHE_DIR'] = os.environ.get(
+    'PAGE_CACHE_DIR', os.path.join(app.instance_path, 'page_cache'))
+app.config['PAGE_CACHE_MAX_BYTES'] = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Seconds a request waits for an identical in-flight render before rendering itself
+app.config['COALESCE_TIMEOUT'] = float(os.environ.get('COALESCE_TIMEOUT', 10))
+# Also coalesce identical renders across gunicorn workers using a file lock
+app.config['COALESCE_ACROSS_WORKERS'] = os.environ.get('COALESCE_ACROSS_WORKERS', '').lower() in ('1', 'true', 'yes')
+
+# Profiling configuration
+# Requests are only profiled with a token signed by PROFILE_SECRET or when sampled.
+# PROFILE_SECRET is also needed to browse captures, so sampling requires it too.
+app.config['PROFILE_SECRET'] = os.environ.get('PROFILE_SECRET')
+# Fraction of requests profiled at random (0 disables sampling)
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+# How long a profiling token stays valid, in seconds
+app.config['PROFILE_TOKEN_MAX_AGE'] = int(os.environ.get('PROFILE_TOKEN_MAX_AGE', 3600))
+# Where captures are stored and how many of the newest are kept
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 50))
+
+# Admission control configuration
+# Set ADMISSION_ENABLED=0 to turn load shedding off. In-flight limits need the
+# threaded workers from gunicorn.conf.py; with sync workers only the queue-wait
+# limit works, and only behind a proxy that sets X-Request-Start. In-process
+# callers such as app.test_client() must close their responses (see admission.py).
+app.config['ADMISSION_ENABLED'] = os.environ.get('ADMISSION_ENABLED', '1').lower() not in ('0', 'false', 'no')
+# Maximum concurrent full renders per worker (only reachable with threaded workers)
+app.config['ADMISSION_MAX_IN_FLIGHT'] = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 8))
+# Maximum time a request may have waited in the proxy queue (needs X-Request-Start)
+app.config['ADMISSION_MAX_QUEUE_WAIT'] = float(os.environ.get('ADMISSION_MAX_QUEUE_WAIT', 1.0))
+# Seconds clients are asked to wait before retrying a shed request
+app.config['ADMISSION_RETRY_AFTER'] = int(os.environ.get('ADMISSION_RETRY_AFTER', 2))
+
+# Static file serving configuration
+# Set STATIC_SERVER_ENABLED=0 to serve static files through Flask instead
+app.config['STATIC_SERVER_ENABLED'] = os.environ.get('STATIC_SERVER_ENABLED', '1').lower() not in ('0', 'false', 'no')
+# Files up to this size are kept in memory, up to STATIC_MEMORY_BUDGET in total
+app.config['STATIC_MEMORY_FILE_LIMIT'] = int(os.environ.get('STATIC_MEMORY_FILE_LIMIT', 256 * 1024))
+app.config['STATIC_MEMORY_BUDGET'] = int(os.environ.get('STATIC_MEMORY_BUDGET', 32 * 1024 * 1024))
+# Browser cache lifetime for static files in seconds (0 means always revalidate)
+app.config['STATIC_MAX_AGE'] = int(os.environ.get('STATIC_MAX_AGE', 0))
+
+# Page-weight budgets checked by `flask assets audit`
+# Default total bytes of static assets a page may download (5 MB)
+app.config['ASSET_PAGE_BUDGET'] = int(os.environ.get('ASSET_PAGE_BUDGET', 5 * 1024 * 1024))
+# Largest allowed single image (500 KB)
+app.config['ASSET_IMAGE_BUDGET'] = int(os.environ.get('ASSET_IMAGE_BUDGET', 500 * 1024))
+# Per-route overrides of the page budget, e.g. {'/': 4 * 1024 * 1024}
+app.config['ASSET_ROUTE_BUDGETS'] = {}
+
+# Maximum number of images kept by the service worker's image cache
+app.config['SERVICE_WORKER_IMAGE_CACHE_MAX'] = int(os.environ.get('SERVICE_WORKER_IMAGE_CACHE_MAX', 60))
+
 # Initialize SQLAlchemy with our Flask app
 # This creates the database connection and ORM functionality
 db = SQLAlchemy(app)
@@ -44,6 +132,11 @@ db = SQLAlchemy(app)
 # Database Models
 # ===============
 
+def utc_now():
+    """Current UTC time as a naive datetime (SQLite stores datetimes without a timezone)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Destination(db.Model):
     """
     Main model for storing destination/content information.
@@ -76,6 +169,10 @@ class Destination(db.Model):
     # Detailed description for individual destination pages (optional)
     long_description = db.Column(db.Text, nullable=True)
 
+    # When this destination was last changed (UTC) - used for sitemap lastmod and the Atom feed
+    # Indexed so "recently changed" queries do not scan the whole table
+    updated_at = db.Column(db.DateTime, nullable=True, default=utc_now, onupdate=utc_now, index=True)
+
     def __repr__(self):
         """String representation of the Destination object for debugging"""
         return f"Destination('{self.title}', '{self.category}')"
@@ -125,6 +222,147 @@ def get_static_url(filename):
         return f'/static/{filename}'
 
 
+# Content Versioning and Fragment Caching
+# =======================================
+
+# Create the shared fragment cache used by all workers on this host
+fragment_cache = FragmentCache(app.config['FRAGMENT_CACHE_DIR'],
+                               app.config['FRAGMENT_CACHE_MAX_BYTES'])
+
+# Version of the templates shipped with this deploy
+# Computed once at startup from the template modification times
+_template_dir = os.path.join(basedir, 'templates')
+TEMPLATE_VERSION = max(
+    (int(os.path.getmtime(os.path.join(_template_dir, name))) for name in os.listdir(_template_dir)),
+    default=0
+)
+
+
+# Version of the files in static/, computed once at startup from their names,
+# sizes and modification times. Changes whenever an asset is added or edited.
+_asset_fingerprint = hashlib.sha1()
+for _root, _dirs, _files in sorted(os.walk(app.static_folder)):
+    for _name in sorted(_files):
+        _stat = os.stat(os.path.join(_root, _name))
+        _asset_fingerprint.update(f'{os.path.join(_root, _name)}:{_stat.st_size}:{_stat.st_mtime_ns}'.encode('utf-8'))
+ASSET_VERSION = _asset_fingerprint.hexdigest()[:12]
+
+
+def get_content_version():
+    """
+    Return a string that changes whenever the site content changes.
+    Any write to the SQLite database updates its modification time, and a new
+    deploy with edited templates changes TEMPLATE_VERSION, so cached fragments
+    keyed on this value are never served stale.
+    """
+    db_path = os.path.join(basedir, 'site.db')
+    try:
+        db_version = os.stat(db_path).st_mtime_ns
+    except OSError:
+        db_version = 0
+    return f'{TEMPLATE_VERSION}-{db_version}'
+
+
+@app.template_global()
+def render_card_items(items):
+    """
+    Render the card-item links for a card slider, using the fragment cache.
+    The cache key is the list of destination ids plus the content version,
+    so the same slider is rendered once and then shared by every worker.
+
+    Args:
+        items (list): Destination objects to render as cards
+
+    Returns:
+        Markup: The rendered card-item HTML
+    """
+    ids = ','.join(str(item.id) for item in items)
+    key = f'cards:{get_content_version()}:{request.script_root}:{ids}'
+
+    # Try the shared cache first
+    html = fragment_cache.get(key)
+    if html is None:
+        # Cache miss - render the fragment and store it for the other workers
+        html = render_template('_card_items.html', items=items)
+        fragment_cache.set(key, html)
+    return Markup(html)
+
+
+# Page Caching and Request Coalescing
+# ===================================
+
+# Create the shared cache for whole rendered pages
+page_cache = FragmentCache(app.config['PAGE_CACHE_DIR'], app.config['PAGE_CACHE_MAX_BYTES'])
+
+# Concurrent misses for the same page wait on a single render
+# When COALESCE_ACROSS_WORKERS is on, workers also serialize on a file lock
+page_single_flight = SingleFlight(
+    os.path.join(app.instance_path, 'single_flight'),
+    timeout=app.config['COALESCE_TIMEOUT'],
+    lock_dir=os.path.join(app.instance_path, 'single_flight', 'locks') if app.config['COALESCE_ACROSS_WORKERS'] else None
+)
+
+
+def page_cache_key(script_root, path):
+    """Cache key for a rendered page: the route path plus the content version"""
+    return f'page:{get_content_version()}:{script_root}{path}'
+
+
+def cached_page(view):
+    """
+    Decorator that serves a route from the shared page cache.
+    On a miss, concurrent requests for the same page and content version are
+    coalesced so only one of them runs the queries and renders the template.
+    Only successful HTML responses are cached. Profiled requests bypass the
+    cache entirely so the capture shows the view itself, not a cache read.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.environ.get(PROFILING_ENVIRON_KEY):
+            # Render fresh and leave the cache untouched
+            response = app.make_response(view(*args, **kwargs))
+            response.headers['X-Cache'] = 'BYPASS'
+            return response
+
+        key = page_cache_key(request.script_root, request.path)
+
+        def load_cached(count=True):
+            # Returns the stored page as a dict, or None on a miss
+            cached = page_cache.get(key, count=count)
+            return json.loads(cached) if cached is not None else None
+
+        def recheck():
+            # Second look under the coalescing lock; the first miss is already counted
+            return load_cached(count=False)
+
+        def render():
+            response = app.make_response(view(*args, **kwargs))
+            page = {
+                'status': response.status_code,
+                'content_type': response.content_type,
+                'body': response.get_data(as_text=True),
+            }
+            # Only store complete, successful HTML pages
+            if response.status_code == 200 and response.mimetype == 'text/html':
+                page_cache.set(key, json.dumps(page))
+            return page
+
+        page = load_cached()
+        cache_status = 'HIT'
+        if page is None:
+            page = page_single_flight.do(key, render, recheck=recheck)
+            cache_status = 'MISS'
+
+        response = Response(page['body'], status=page['status'], content_type=page['content_type'])
+        response.headers['X-Cache'] = cache_status
+        # Let browsers revalidate with If-None-Match and get a cheap 304
+        if response.status_code == 200:
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+    return wrapper
+
+
 # Request Context Processors
 # ==========================
 
@@ -149,6 +387,7 @@ def get_categories():
 # ==============
 
 @app.route('/')
+@cached_page
 def home():
     """
     Home page route handler.
@@ -180,6 +419,7 @@ def home():
 
 
 @app.route('/about')
+@cached_page
 def about():
     """
     About Us page route handler.
@@ -193,6 +433,7 @@ def about():
 
 
 @app.route('/privacy')
+@cached_page
 def privacy():
     """
     Privacy Policy page route handler.
@@ -202,6 +443,7 @@ def privacy():
 
 
 @app.route('/terms')
+@cached_page
 def terms():
     """
     Terms of Use page route handler.
@@ -215,6 +457,7 @@ def terms():
 # These routes handle the main category pages using a shared template
 
 @app.route('/culture')
+@cached_page
 def culture():
     """
     Culture category page route handler.
@@ -234,6 +477,7 @@ def culture():
 
 
 @app.route('/history')
+@cached_page
 def history():
     """
     History category page route handler.
@@ -253,6 +497,7 @@ def history():
 
 
 @app.route('/nature')
+@cached_page
 def nature():
     """
     Nature category page route handler.
@@ -272,6 +517,7 @@ def nature():
 
 
 @app.route('/cuisine')
+@cached_page
 def cuisine():
     """
     Cuisine category page route handler.
@@ -295,10 +541,94 @@ def cuisine():
                          category='cuisine')
 
 
+# Metrics Route
+# =============
+
+@app.route('/metrics')
+def metrics():
+    """
+    Metrics route handler.
+    Returns JSON counters for the caching layers, such as the fragment hit rate.
+    """
+    return jsonify(fragment_cache=fragment_cache.stats(),
+                   page_cache=page_cache.stats(),
+                   coalescing=page_single_flight.stats(),
+                   admission=admission.stats() if admission else None,
+                   static_files=static_files.stats() if static_files else None)
+
+
+# Profile Capture Routes
+# ======================
+# Browse the captures written by the profiling middleware (installed below,
+# in the WSGI Middleware section)
+
+profile_store = ProfileStore(app.config['PROFILE_DIR'], keep=app.config['PROFILE_KEEP'])
+
+# Sampled captures could never be browsed without a secret to sign admin tokens
+if app.config['PROFILE_SAMPLE_RATE'] > 0 and not app.config['PROFILE_SECRET']:
+    raise RuntimeError('PROFILE_SAMPLE_RATE is set but PROFILE_SECRET is not; '
+                       'set PROFILE_SECRET so sampled profiles can be viewed at /admin/profiles.')
+
+
+def require_profile_token():
+    """
+    Abort with 404 unless the request carries a valid profiling token.
+    404 rather than 403 so the admin pages are invisible without a token.
+    """
+    # Same header and query parameter that switch profiling on
+    token = request.headers.get('X-Profile-Token') or request.args.get(TOKEN_PARAM)
+    if not check_token(app.config['PROFILE_SECRET'], token, app.config['PROFILE_TOKEN_MAX_AGE']):
+        abort(404)
+    return token
+
+
+@app.template_filter('datetimeformat')
+def datetimeformat(timestamp):
+    """Format a Unix timestamp as a readable UTC date and time"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    """
+    Profile captures admin page.
+    Lists the most recent request profiles with links to their files.
+    """
+    token = require_profile_token()
+    return render_template('admin_profiles.html',
+                         captures=profile_store.list(),
+                         token=token)
+
+
+@app.route('/admin/profiles/<capture_id>.<kind>')
+def admin_profile_file(capture_id, kind):
+    """
+    Download one file from a profile capture.
+
+    Args:
+        capture_id (str): Id of the capture (the request id plus a random suffix)
+        kind (str): One of prof, txt, collapsed or svg
+    """
+    require_profile_token()
+    if kind not in CAPTURE_FILES:
+        abort(404)
+    return send_from_directory(profile_store.directory, f'{capture_id}.{kind}',
+                               mimetype=CAPTURE_FILES[kind])
+
+
+@app.cli.command('profile-token')
+def profile_token_command():
+    """Print a signed token that enables request profiling."""
+    if not app.config['PROFILE_SECRET']:
+        raise SystemExit('Set PROFILE_SECRET to enable request profiling.')
+    print(issue_token(app.config['PROFILE_SECRET']))
+
+
 # Dynamic Detail Page Route
 # =========================
 
 @app.route('/details/<string:title>')
+@cached_page
 def details(title):
     """
     Dynamic details page route handler.
@@ -323,6 +653,246 @@ def details(title):
                          all_related_items=all_related_items)
 
 
+# Sitemap and Feed Routes
+# =======================
+# These responses are streamed straight from a database cursor so the full
+# catalog never has to be held in memory at once
+
+# The sitemap protocol allows at most 50,000 URLs per sitemap file
+SITEMAP_MAX_URLS = 50000
+
+# Number of recently changed destinations included in the Atom feed
+FEED_MAX_ENTRIES = 50
+
+# Categories whose destinations have their own details pages
+SITEMAP_CATEGORIES = ['Culture', 'Cuisine', 'History', 'Nature']
+
+# Static pages listed at the start of the first sitemap
+SITEMAP_STATIC_ENDPOINTS = ['home', 'culture', 'cuisine', 'history', 'nature', 'about', 'privacy', 'terms']
+
+
+def w3c_datetime(value):
+    """Format a naive UTC datetime in the W3C/RFC 3339 format used by sitemaps and Atom"""
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def catalog_validators():
+    """
+    Return (count, last_modified, etag) for the destinations listed in the
+    sitemap and feed. Used for conditional GET support.
+    """
+    count, last_modified = db.session.query(
+        db.func.count(Destination.id), db.func.max(Destination.updated_at)
+    ).filter(Destination.category.in_(SITEMAP_CATEGORIES)).one()
+
+    last_modified = last_modified or datetime(1970, 1, 1)
+    etag = hashlib.sha1(f'{count}:{last_modified.isoformat()}'.encode('utf-8')).hexdigest()
+    return count, last_modified, etag
+
+
+def streamed_xml(generator, mimetype, etag, last_modified):
+    """
+    Build a streaming XML response, or an empty 304 response if the client's
+    cached copy (If-None-Match / If-Modified-Since) is still current.
+    """
+    last_modified = last_modified.replace(tzinfo=timezone.utc)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        response = Response(stream_with_context(generator), mimetype=mimetype)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response
+
+
+def iter_destinations(offset, limit):
+    """
+    Yield (title, updated_at) rows for destinations with details pages,
+    reading them in batches from a server-side cursor.
+    """
+    query = db.select(Destination.title, Destination.updated_at).where(
+        Destination.category.in_(SITEMAP_CATEGORIES)
+    ).order_by(Destination.id).offset(offset).limit(limit).execution_options(yield_per=1000)
+
+    for row in db.session.execute(query):
+        yield row
+
+
+def generate_sitemap_urls(page, total_urls, last_modified):
+    """
+    Generator for one <urlset> sitemap file.
+    The first sitemap starts with the static pages, then every sitemap is
+    filled with destination details pages up to SITEMAP_MAX_URLS entries.
+    """
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+
+    # Work out which slice of the overall URL list belongs to this page
+    start = page * SITEMAP_MAX_URLS
+    end = min(start + SITEMAP_MAX_URLS, total_urls)
+    static_count = len(SITEMAP_STATIC_ENDPOINTS)
+
+    # Static pages only appear in the first sitemap
+    for endpoint in SITEMAP_STATIC_ENDPOINTS[start:end]:
+        yield '  <url><loc>%s</loc><lastmod>%s</lastmod></url>\n' % (
+            xml_escape(url_for(endpoint, _external=True)), w3c_datetime(last_modified))
+
+    # Destinations fill the rest of the page
+    offset = max(start - static_count, 0)
+    limit = end - max(start, static_count)
+    if limit > 0:
+        for title, updated_at in iter_destinations(offset, limit):
+            yield '  <url><loc>%s</loc><lastmod>%s</lastmod></url>\n' % (
+                xml_escape(url_for('details', title=title, _external=True)),
+                w3c_datetime(updated_at or last_modified))
+
+    yield '</urlset>\n'
+
+
+def generate_sitemap_index(page_count, last_modified):
+    """Generator for the <sitemapindex> that points at every sitemap page"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for page in range(page_count):
+        yield '  <sitemap><loc>%s</loc><lastmod>%s</lastmod></sitemap>\n' % (
+            xml_escape(url_for('sitemap_page', page=page, _external=True)), w3c_datetime(last_modified))
+    yield '</sitemapindex>\n'
+
+
+@app.route('/sitemap.xml')
+def sitemap():
+    """
+    Sitemap route handler.
+    Returns a single sitemap for small catalogs, or a sitemap index that
+    splits the catalog into pages of at most SITEMAP_MAX_URLS URLs.
+    """
+    count, last_modified, etag = catalog_validators()
+    total_urls = len(SITEMAP_STATIC_ENDPOINTS) + count
+
+    if total_urls <= SITEMAP_MAX_URLS:
+        generator = generate_sitemap_urls(0, total_urls, last_modified)
+    else:
+        page_count = math.ceil(total_urls / SITEMAP_MAX_URLS)
+        generator = generate_sitemap_index(page_count, last_modified)
+
+    return streamed_xml(generator, 'application/xml', etag, last_modified)
+
+
+@app.route('/sitemap-<int:page>.xml')
+def sitemap_page(page):
+    """
+    Sitemap page route handler.
+    Returns one page of the catalog when the sitemap index is in use.
+
+    Args:
+        page (int): Zero-based sitemap page number
+    """
+    count, last_modified, etag = catalog_validators()
+    total_urls = len(SITEMAP_STATIC_ENDPOINTS) + count
+
+    # Return 404 for pages past the end of the catalog
+    if page * SITEMAP_MAX_URLS >= total_urls:
+        abort(404)
+
+    generator = generate_sitemap_urls(page, total_urls, last_modified)
+    return streamed_xml(generator, 'application/xml', etag, last_modified)
+
+
+def generate_atom_feed(last_modified):
+    """Generator for an Atom feed of the most recently changed destinations"""
+    home_url = url_for('home', _external=True)
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield '  <title>Discover India - Recently Updated</title>\n'
+    yield '  <id>%s</id>\n' % xml_escape(home_url)
+    yield '  <link href="%s"/>\n' % xml_escape(home_url)
+    yield '  <link rel="self" href="%s"/>\n' % xml_escape(url_for('atom_feed', _external=True))
+    yield '  <updated>%s</updated>\n' % w3c_datetime(last_modified)
+    # RFC 4287 requires an author; a feed-level author covers every entry
+    yield '  <author><name>Discover India</name></author>\n'
+
+    # Newest changes first, read from a server-side cursor
+    query = db.select(Destination.title, Destination.description, Destination.updated_at).where(
+        Destination.category.in_(SITEMAP_CATEGORIES)
+    ).order_by(Destination.updated_at.desc(), Destination.id.desc()).limit(FEED_MAX_ENTRIES).execution_options(yield_per=100)
+
+    for title, description, updated_at in db.session.execute(query):
+        entry_url = xml_escape(url_for('details', title=title, _external=True))
+        yield '  <entry>\n'
+        yield '    <title>%s</title>\n' % xml_escape(title)
+        yield '    <id>%s</id>\n' % entry_url
+        yield '    <link href="%s"/>\n' % entry_url
+        yield '    <updated>%s</updated>\n' % w3c_datetime(updated_at or last_modified)
+        yield '    <summary>%s</summary>\n' % xml_escape(description)
+        yield '  </entry>\n'
+
+    yield '</feed>\n'
+
+
+@app.route('/feed.atom')
+def atom_feed():
+    """
+    Atom feed route handler.
+    Lists the most recently changed destinations for feed readers and crawlers.
+    """
+    count, last_modified, etag = catalog_validators()
+    return streamed_xml(generate_atom_feed(last_modified), 'application/atom+xml', etag, last_modified)
+
+
+@app.route('/robots.txt')
+def robots():
+    """
+    Robots route handler.
+    Points crawlers at the sitemap so they do not need to discover pages by following links.
+    """
+    body = 'User-agent: *\nAllow: /\nDisallow: /admin/\nSitemap: %s\n' % url_for('sitemap', _external=True)
+    return Response(body, mimetype='text/plain')
+
+
+# Service Worker Route
+# ====================
+
+# Pages downloaded by the service worker when it installs
+SERVICE_WORKER_PAGES = ['home', 'culture', 'cuisine', 'history', 'nature', 'about']
+
+
+@app.route('/sw.js')
+def service_worker():
+    """
+    Service worker route handler.
+    Generates the service worker script with its precache manifest: the
+    stylesheet, the script, every hero image and the top pages. The version
+    is built from the asset and content versions so any change rolls out as
+    a new worker with new caches.
+    """
+    # Hero images for the home, about and category pages
+    hero_images = [row[0] for row in db.session.query(Destination.image_url).filter(
+        Destination.category.in_(['Hero', 'About']), Destination.image_url.isnot(None))]
+    hero_images += [row[0] for row in db.session.query(CategoryHero.image_url)]
+
+    precache_assets = [url_for('static', filename=filename)
+                       for filename in ['css/style.css', 'js/main.js'] + sorted(set(hero_images))]
+    precache_pages = [url_for(endpoint) for endpoint in SERVICE_WORKER_PAGES]
+    version = hashlib.sha1(f'{ASSET_VERSION}:{get_content_version()}'.encode('utf-8')).hexdigest()[:12]
+
+    script = render_template('sw.js',
+                             version=version,
+                             asset_version=ASSET_VERSION,
+                             precache_assets=precache_assets,
+                             precache_pages=precache_pages,
+                             static_prefix=url_for('static', filename=''),
+                             offline_page=url_for('home'),
+                             image_cache_max_entries=app.config['SERVICE_WORKER_IMAGE_CACHE_MAX'])
+
+    response = Response(script, mimetype='application/javascript')
+    # Browsers must always check for a new version of the worker
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Service-Worker-Allowed'] = url_for('home')
+    return response
+
+
 # Cuisine Subcategory Routes
 # ==========================
 # These routes handle specific cuisine subcategories
@@ -441,9 +1011,216 @@ def street_food_page():
                          page_title='Street Food of India')
 
 
+# Asset Audit Command
+# ===================
+
+assets_cli = AppGroup('assets', help='Static asset tools.')
+
+
+def parse_route_budgets(values):
+    """Turn ROUTE=BYTES command line values into a dictionary"""
+    budgets = {}
+    for value in values:
+        route, _, size = value.partition('=')
+        if not route or not size.isdigit():
+            raise click.BadParameter(f'expected ROUTE=BYTES, got {value!r}', param_hint='--budget')
+        budgets[route] = int(size)
+    return budgets
+
+
+def audit_page_urls():
+    """
+    Absolute URLs of every page the audit renders: each GET route without
+    arguments plus one details page per destination. Token-protected admin
+    routes are skipped because they answer 404 by design.
+    Must be called inside a request context.
+    """
+    page_urls = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.arguments or 'GET' not in rule.methods or rule.rule.startswith('/admin/'):
+            continue
+        page_urls.append(url_for(rule.endpoint, _external=True))
+    page_urls += [url_for('details', title=title, _external=True)
+                  for title, _ in iter_destinations(0, None)]
+    return page_urls
+
+
+@assets_cli.command('audit')
+@click.option('--page-budget', type=int, help='Maximum static bytes per page (default: ASSET_PAGE_BUDGET).')
+@click.option('--image-budget', type=int, help='Maximum bytes per image (default: ASSET_IMAGE_BUDGET).')
+@click.option('--budget', 'route_budgets', multiple=True, metavar='ROUTE=BYTES',
+              help='Byte budget for one route, e.g. --budget /=4000000. Repeatable.')
+def audit_assets_command(page_budget, image_budget, route_budgets):
+    """
+    Render every page and report its static asset weight.
+    Flags missing, unreferenced and oversized assets, and exits with status 1
+    when an asset is missing or a budget is exceeded.
+    """
+    # Compare with None so an explicit budget of 0 is honoured
+    if page_budget is None:
+        page_budget = app.config['ASSET_PAGE_BUDGET']
+    if image_budget is None:
+        image_budget = app.config['ASSET_IMAGE_BUDGET']
+    budgets = dict(app.config['ASSET_ROUTE_BUDGETS'], **parse_route_budgets(route_budgets))
+    # Budgets are matched against decoded paths, so '/details/Durga Puja' and
+    # '/details/Durga%20Puja' name the same route
+    budgets = {unquote(route): size for route, size in budgets.items()}
+    static_folder = app.static_folder
+    failures = 0
+
+    # Every route, so broken pages show up as RENDER FAILED
+    with app.test_request_context():
+        host = request.host
+        page_urls = audit_page_urls()
+
+    results = audit_pages(app.test_client(), page_urls, app.static_url_path, static_folder, host)
+
+    # Per-page weight
+    click.echo(f'{"page":<50} {"status":>6} {"requests":>8} {"bytes":>10} {"budget":>10}')
+    for page in results['pages']:
+        path = unquote(page['url'].split(host, 1)[-1])
+        budget = budgets.get(path, page_budget)
+        total = sum(page['assets'].values())
+        requests_count = len(page['assets']) + len(page['external'])
+        flag = ''
+        if page['status'] != 200:
+            flag = '  RENDER FAILED'
+            failures += 1
+        elif total > budget:
+            flag = '  OVER BUDGET'
+            failures += 1
+        click.echo(f'{path:<50} {page["status"]:>6} {requests_count:>8} {total:>10} {budget:>10}{flag}')
+
+    if results['missing']:
+        click.echo('\nMissing assets:')
+        for url, pages in sorted(results['missing'].items()):
+            click.echo(f'  {url} (referenced by {len(pages)} page(s))')
+            failures += 1
+
+    oversized = find_oversized_images(static_folder, image_budget)
+    if oversized:
+        click.echo(f'\nImages over the {image_budget} byte budget:')
+        for path in oversized:
+            click.echo(f'  {os.path.relpath(path, static_folder)} ({os.path.getsize(path)} bytes)')
+            failures += 1
+
+    unreferenced = find_unreferenced_images(static_folder, results['referenced'])
+    if unreferenced:
+        click.echo('\nUnreferenced images (not used by any audited page):')
+        for path in unreferenced:
+            click.echo(f'  {os.path.relpath(path, static_folder)} ({os.path.getsize(path)} bytes)')
+
+    suspicious = find_suspicious_names(static_folder)
+    if suspicious:
+        click.echo('\nSuspicious file names:')
+        for path in suspicious:
+            click.echo(f'  {os.path.relpath(path, static_folder)}')
+
+    if failures:
+        raise SystemExit(f'\nAsset audit failed with {failures} problem(s).')
+    click.echo('\nAsset audit passed.')
+
+
+app.cli.add_command(assets_cli)
+
+
+# WSGI Middleware
+# ===============
+# Layers wrapped around the Flask app once every route is registered.
+# Each one wraps the previous app.wsgi_app, so the last one installed runs
+# first: static files -> admission control -> profiling -> Flask
+
+# Request profiling
+# Only installed when profiling is configured, so ordinary deployments pay
+# no overhead at all
+if app.config['PROFILE_SECRET'] or app.config['PROFILE_SAMPLE_RATE'] > 0:
+    app.wsgi_app = ProfilingMiddleware(
+        app.wsgi_app,
+        profile_store,
+        secret=app.config['PROFILE_SECRET'],
+        sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+        token_max_age=app.config['PROFILE_TOKEN_MAX_AGE'],
+        # Browsing captures should not create new ones
+        skip_prefixes=('/admin/profiles',)
+    )
+
+
+# Admission control
+# Installed after the profiler so overloaded requests are rejected before
+# any profiling, database or template work happens
+
+# Routes that answer If-None-Match / If-Modified-Since with a cheap 304
+CONDITIONAL_PATHS = ('/sitemap.xml', '/feed.atom')
+
+
+def is_cheap_request(environ):
+    """
+    Decide whether a request is cheap to serve, so it is shed last.
+    Cheap requests are static files, pages already in the page cache and
+    conditional requests for the sitemap and feed.
+    """
+    path = environ.get('PATH_INFO', '')
+    if path.startswith(app.static_url_path + '/'):
+        return True
+    if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+        return False
+    if (environ.get('HTTP_IF_NONE_MATCH') or environ.get('HTTP_IF_MODIFIED_SINCE')) and path in CONDITIONAL_PATHS:
+        return True
+    return page_cache.contains(page_cache_key(environ.get('SCRIPT_NAME', ''), path))
+
+
+admission = None
+if app.config['ADMISSION_ENABLED']:
+    admission = AdmissionController(
+        app.wsgi_app,
+        is_cheap_request,
+        os.path.join(app.instance_path, 'admission'),
+        max_in_flight=app.config['ADMISSION_MAX_IN_FLIGHT'],
+        max_queue_wait=app.config['ADMISSION_MAX_QUEUE_WAIT'],
+        retry_after=app.config['ADMISSION_RETRY_AFTER']
+    )
+    app.wsgi_app = admission
+
+
+# Static file serving
+# Mounted last so it sits in front of everything else: static requests never
+# reach admission control, the profiler or Flask's before_request hooks
+
+static_files = None
+if app.config['STATIC_SERVER_ENABLED']:
+    static_files = StaticFiles(
+        app.wsgi_app,
+        app.static_folder,
+        url_prefix=app.static_url_path,
+        max_age=app.config['STATIC_MAX_AGE'],
+        memory_file_limit=app.config['STATIC_MEMORY_FILE_LIMIT'],
+        memory_budget=app.config['STATIC_MEMORY_BUDGET']
+    )
+    app.wsgi_app = static_files
+
+
 # Database initialization function for Render
 # ==========================================
 
+def upgrade_database():
+    """
+    Add columns introduced after the database was first created.
+    db.create_all() only creates missing tables, so new columns on existing
+    tables are added here. Safe to call multiple times.
+    """
+    inspector = db.inspect(db.engine)
+    columns = [column['name'] for column in inspector.get_columns('destination')]
+
+    if 'updated_at' not in columns:
+        # Add the updated-at column and stamp existing rows with the current time
+        with db.engine.begin() as connection:
+            connection.execute(db.text('ALTER TABLE destination ADD COLUMN updated_at DATETIME'))
+            connection.execute(db.text('UPDATE destination SET updated_at = CURRENT_TIMESTAMP'))
+            connection.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_destination_updated_at ON destination (updated_at)'))
+        print("Added updated_at column to destination table.")
+
+
 def init_database():
     """
     Initialize database with sample data.
@@ -451,6 +1228,9 @@ def init_database():
     """
     # Create all database tables based on our models
     db.create_all()
+
+    # Bring existing tables up to date with the current models
+    upgrade_database()
     
     # Check if the database is empty before populating it
     # This prevents duplicate data on subsequent runs
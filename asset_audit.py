@@ -0,0 +1,181 @@
+# asset_audit.py
+# Page-weight audit for the Discover India application
+# Renders pages in-process, finds every asset they reference (including
+# images referenced from stylesheets), and works out how many requests and
+# bytes each page costs. Used by the `flask assets audit` command in app.py.
+
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import unquote, urljoin, urlsplit
+
+# url(...) references inside CSS and inline style attributes
+CSS_URL = re.compile(r'''url\(\s*['"]?([^'")]+?)['"]?\s*\)''')
+
+# Image file types checked for size and for being unreferenced
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg')
+
+# Characters that are safe in static file names without URL quoting
+SAFE_FILE_NAME = re.compile(r'^[A-Za-z0-9._-]+$')
+
+
+class AssetCollector(HTMLParser):
+    """
+    Collects the URLs a browser would download to display a page:
+    images, scripts, stylesheets, icons and CSS url() references.
+    Ordinary <a href> links are navigation, not page weight, so they are skipped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self._in_style = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ('img', 'script', 'source', 'video', 'audio', 'iframe') and attrs.get('src'):
+            self.urls.append(attrs['src'])
+        if attrs.get('srcset'):
+            # "image-1x.jpg 1x, image-2x.jpg 2x" -> each candidate URL
+            self.urls.extend(candidate.split()[0] for candidate in attrs['srcset'].split(',') if candidate.strip())
+        if tag == 'link' and attrs.get('href'):
+            rel = (attrs.get('rel') or '').lower()
+            # preconnect/dns-prefetch/alternate do not download anything for the page
+            if any(kind in rel for kind in ('stylesheet', 'icon', 'preload', 'manifest')):
+                self.urls.append(attrs['href'])
+        if attrs.get('style'):
+            self.urls.extend(CSS_URL.findall(attrs['style']))
+        if tag == 'style':
+            self._in_style = True
+
+    def handle_endtag(self, tag):
+        if tag == 'style':
+            self._in_style = False
+
+    def handle_data(self, data):
+        if self._in_style:
+            self.urls.extend(CSS_URL.findall(data))
+
+
+def find_page_assets(html, page_url):
+    """Return the absolute URLs of every asset referenced by a page"""
+    collector = AssetCollector()
+    collector.feed(html)
+    return [urljoin(page_url, url.strip()) for url in collector.urls if not url.strip().startswith('data:')]
+
+
+def resolve_static(url, static_url_path, static_folder, host):
+    """
+    Map an asset URL to a file in the static folder.
+
+    Returns:
+        (is_static, path): is_static is False for external URLs; path is None
+        when a static URL points at a file that does not exist
+    """
+    parts = urlsplit(url)
+    if parts.netloc and parts.netloc != host:
+        return False, None
+    prefix = static_url_path.rstrip('/') + '/'
+    if not parts.path.startswith(prefix):
+        return False, None
+
+    relative = unquote(parts.path[len(prefix):])
+    path = os.path.normpath(os.path.join(static_folder, relative))
+    # Never follow ../ out of the static folder
+    if not path.startswith(os.path.abspath(static_folder) + os.sep) or not os.path.isfile(path):
+        return True, None
+    return True, path
+
+
+def audit_pages(client, page_urls, static_url_path, static_folder, host):
+    """
+    Render every page and measure the assets it needs.
+
+    Args:
+        client: Flask test client used to render pages in-process
+        page_urls (list): Absolute URLs of the pages to audit
+        static_url_path (str): URL prefix of static files, e.g. /static
+        static_folder (str): Folder that static files are served from
+        host (str): Host name the pages are served under
+
+    Returns:
+        dict with 'pages' (one report per page), 'missing' (asset URL -> pages
+        that reference it) and 'referenced' (set of static file paths used)
+    """
+    pages = []
+    missing = {}
+    referenced = set()
+    # Assets referenced by each stylesheet, parsed once
+    stylesheet_assets = {}
+
+    for page_url in page_urls:
+        response = client.get(page_url)
+        html = response.get_data(as_text=True)
+        # Close the response so middleware sees the request as finished
+        response.close()
+        report = {'url': page_url, 'status': response.status_code, 'assets': {}, 'external': set()}
+        pages.append(report)
+        # Feeds, scripts and JSON are checked for errors but have no page assets
+        if response.status_code != 200 or response.mimetype != 'text/html':
+            continue
+
+        queue = find_page_assets(html, page_url)
+        seen = set()
+        while queue:
+            url = queue.pop(0)
+            if url in seen:
+                continue
+            seen.add(url)
+
+            is_static, path = resolve_static(url, static_url_path, static_folder, host)
+            if not is_static:
+                report['external'].add(url)
+                continue
+            if path is None:
+                missing.setdefault(url, set()).add(page_url)
+                continue
+
+            referenced.add(path)
+            report['assets'][url] = os.path.getsize(path)
+
+            # Stylesheets pull in their own images and fonts
+            if path.endswith('.css'):
+                if path not in stylesheet_assets:
+                    with open(path, encoding='utf-8', errors='replace') as css_file:
+                        stylesheet_assets[path] = [urljoin(url, ref.strip()) for ref in CSS_URL.findall(css_file.read())
+                                                   if not ref.strip().startswith('data:')]
+                queue.extend(stylesheet_assets[path])
+
+    return {'pages': pages, 'missing': missing, 'referenced': referenced}
+
+
+def find_unreferenced_images(static_folder, referenced):
+    """Return image files in the static folder that no audited page uses"""
+    unreferenced = []
+    for root, _, names in os.walk(static_folder):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            if name.lower().endswith(IMAGE_EXTENSIONS) and path not in referenced:
+                unreferenced.append(path)
+    return sorted(unreferenced)
+
+
+def find_oversized_images(static_folder, budget):
+    """Return image files in the static folder that are larger than budget bytes"""
+    oversized = []
+    for root, _, names in os.walk(static_folder):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            if name.lower().endswith(IMAGE_EXTENSIONS) and os.path.getsize(path) > budget:
+                oversized.append(path)
+    return sorted(oversized)
+
+
+def find_suspicious_names(static_folder):
+    """Return static files whose names contain characters such as commas or spaces"""
+    suspicious = []
+    for root, _, names in os.walk(static_folder):
+        for name in sorted(names):
+            if not SAFE_FILE_NAME.match(name):
+                suspicious.append(os.path.join(root, name))
+    return sorted(suspicious)
@@ -0,0 +1,63 @@
+# bench_static.py
+# Benchmark static file serving: the StaticFiles layer versus Flask's own
+# static route (send_from_directory plus the before_request hook).
+# Requests are made in-process through WSGI, so the numbers measure the
+# Python work per request rather than the network.
+#
+# Usage:
+#   python bench_static.py [--requests 2000]
+
+import argparse
+import time
+
+from werkzeug.test import EnvironBuilder
+
+from app import app, static_files
+
+# A small stylesheet/script and a range of image sizes
+PATHS = [
+    '/static/css/style.css',
+    '/static/js/main.js',
+    '/static/images/south-indian.jpg',
+    '/static/images/holi.jpg',
+    '/static/images/about-us-hero.jpg',
+]
+
+
+def run(wsgi_app, path, count):
+    """Call wsgi_app count times for path and return requests per second"""
+    environ = EnvironBuilder(path=path, base_url='http://%s' % (app.config['SERVER_NAME'] or 'localhost')).get_environ()
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(count):
+        body = wsgi_app(dict(environ), start_response)
+        for _chunk in body:
+            pass
+        if hasattr(body, 'close'):
+            body.close()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark static file serving.')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per path and server')
+    args = parser.parse_args()
+
+    if static_files is None:
+        raise SystemExit('STATIC_SERVER_ENABLED is off - nothing to compare.')
+
+    # static_files.wsgi_app is the rest of the stack without the static layer
+    flask_path = static_files.wsgi_app
+
+    print('%-36s %12s %12s %8s' % ('path', 'flask req/s', 'static req/s', 'speedup'))
+    for path in PATHS:
+        flask_rate = run(flask_path, path, args.requests)
+        static_rate = run(static_files, path, args.requests)
+        print('%-36s %12.0f %12.0f %7.1fx' % (path, flask_rate, static_rate, static_rate / flask_rate))
+
+
+if __name__ == '__main__':
+    main()
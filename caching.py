@@ -0,0 +1,375 @@
+# caching.py
+# Shared on-disk caching helpers for the Discover India application
+# Everything stored here lives on the local filesystem so that every gunicorn
+# worker on the same host sees the same cached data and the same counters
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+# fcntl is only available on Unix. On Windows (local development) we fall back
+# to per-process counters and skip the cross-process locks.
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+# Shared Counters
+# ===============
+
+class SharedCounters:
+    """
+    A small set of named 64-bit counters stored in a memory-mapped file.
+    Every worker process maps the same file, so increments made by one worker
+    are visible to all the others (used for cache hit/miss metrics).
+    """
+
+    def __init__(self, path, names):
+        self.path = path
+        self.names = list(names)
+        # Each counter occupies one signed 64-bit slot in the file
+        self._size = 8 * len(self.names)
+        self._local = dict.fromkeys(self.names, 0)
+        # flock only excludes other processes; threads in this worker share the
+        # same file descriptor, so they also need an ordinary lock
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._fd = None
+
+        if fcntl is None:
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        # Grow the file to the right size the first time it is created
+        if os.fstat(self._fd).st_size < self._size:
+            os.ftruncate(self._fd, self._size)
+        self._mmap = mmap.mmap(self._fd, self._size)
+
+    def _offset(self, name):
+        return 8 * self.names.index(name)
+
+    def add(self, name, amount=1):
+        """Add amount to the named counter (amount may be negative)."""
+        with self._lock:
+            if self._mmap is None:
+                self._local[name] += amount
+                return
+            offset = self._offset(name)
+            # Lock the file so two workers never interleave a read-modify-write
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                (value,) = struct.unpack_from('<q', self._mmap, offset)
+                struct.pack_into('<q', self._mmap, offset, value + amount)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def set(self, name, value):
+        """Overwrite the named counter with an absolute value."""
+        with self._lock:
+            if self._mmap is None:
+                self._local[name] = value
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                struct.pack_into('<q', self._mmap, self._offset(name), value)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def get(self, name):
+        """Read the current value of the named counter."""
+        if self._mmap is None:
+            return self._local[name]
+        return struct.unpack_from('<q', self._mmap, self._offset(name))[0]
+
+    def snapshot(self):
+        """Return all counters as a plain dictionary."""
+        return {name: self.get(name) for name in self.names}
+
+
+# Fragment Cache
+# ==============
+
+class FragmentCache:
+    """
+    Size-bounded cache of rendered HTML fragments stored as files on disk.
+
+    Each entry is one file named after the SHA-1 of its key, written atomically
+    so readers in other workers never see a half-written fragment. Reading an
+    entry bumps its modification time, which gives us approximate LRU order
+    when the cache grows beyond max_bytes and old entries must be evicted.
+    """
+
+    # Counters shared between all workers using the same cache directory
+    COUNTERS = ('hits', 'misses', 'sets', 'evictions', 'bytes')
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.counters = SharedCounters(os.path.join(directory, 'stats.bin'), self.COUNTERS)
+        self._lock_path = os.path.join(directory, 'evict.lock')
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        # Two-level directory layout keeps directories small
+        return os.path.join(self.directory, digest[:2], digest + '.frag')
+
+    def get(self, key, count=True):
+        """
+        Return the cached fragment for key, or None on a miss.
+        Pass count=False for a repeat lookup that should not change the hit/miss counters.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fragment_file:
+                data = fragment_file.read()
+        except FileNotFoundError:
+            if count:
+                self.counters.add('misses')
+            return None
+
+        # Touch the file so recently used fragments survive eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        if count:
+            self.counters.add('hits')
+        return data.decode('utf-8')
+
+    def contains(self, key):
+        """
+        Return True if a fragment is cached for key (does not count as a hit).
+        """
+        return os.path.exists(self._path(key))
+
+    def set(self, key, value):
+        """
+        Store a fragment for key, evicting old entries if the cache is full.
+        """
+        path = self._path(key)
+        data = value.encode('utf-8')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Size of any entry we are about to replace
+        try:
+            previous_size = os.path.getsize(path)
+        except OSError:
+            previous_size = 0
+
+        # Write to a temporary file first, then atomically move it into place
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Caching is best effort - never fail the request because of it
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self.counters.add('sets')
+        self.counters.add('bytes', len(data) - previous_size)
+        if self.counters.get('bytes') > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        """Yield (mtime, size, path) for every fragment file on disk."""
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith('.frag'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def evict(self):
+        """
+        Remove the least recently used fragments until the cache is back under
+        90% of max_bytes. Only one worker evicts at a time; others skip it.
+        """
+        lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Another worker is already evicting
+                    return
+
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            evicted = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+
+            # Re-sync the byte counter with what is actually on disk
+            self.counters.set('bytes', total)
+            self.counters.add('evictions', evicted)
+        finally:
+            os.close(lock_fd)
+
+    def clear(self):
+        """Remove every cached fragment."""
+        for _, _, path in list(self._entries()):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self.counters.set('bytes', 0)
+
+    def stats(self):
+        """
+        Return cache counters plus the hit rate shared across all workers.
+        """
+        stats = self.counters.snapshot()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+# Single-Flight Request Coalescing
+# ================================
+
+class _Call:
+    """One in-flight computation that other threads can wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Makes concurrent identical computations share one result.
+
+    The first thread to ask for a key (the leader) runs the computation while
+    other threads asking for the same key wait for it instead of repeating the
+    work. When lock_dir is given, leaders in different worker processes also
+    serialize on a file lock, so a worker that waited can pick up the result
+    another worker just stored (via the recheck callback) instead of
+    recomputing it.
+    """
+
+    COUNTERS = ('leaders', 'coalesced', 'coalesced_across_workers', 'timeouts')
+
+    def __init__(self, stats_dir, timeout=10.0, lock_dir=None):
+        self.timeout = timeout
+        self.lock_dir = lock_dir
+        self._lock = threading.Lock()
+        self._calls = {}
+        os.makedirs(stats_dir, exist_ok=True)
+        self.counters = SharedCounters(os.path.join(stats_dir, 'stats.bin'), self.COUNTERS)
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def do(self, key, compute, recheck=None):
+        """
+        Return compute() for key, sharing the result with concurrent callers.
+
+        Args:
+            key (str): Identifies identical computations
+            compute (callable): Produces the result
+            recheck (callable): Optional; returns an already cached result (or
+                None) once the cross-worker lock has been acquired
+
+        Returns:
+            The result of compute() (or recheck()) for this key
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            # Another thread is already computing this key - wait for it
+            if not call.event.wait(self.timeout):
+                # Leader is taking too long, do the work ourselves
+                self.counters.add('timeouts')
+                return compute()
+            self.counters.add('coalesced')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self.counters.add('leaders')
+        try:
+            call.result = self._lead(key, compute, recheck)
+            return call.result
+        except Exception as error:
+            # Share the failure with any waiting followers
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def _lead(self, key, compute, recheck):
+        """Run the computation, holding the cross-worker lock if enabled."""
+        if not self.lock_dir or fcntl is None:
+            return compute()
+
+        lock_fd = self._acquire_file_lock(key)
+        try:
+            if recheck is not None:
+                # Another worker may have finished while we waited for the lock
+                result = recheck()
+                if result is not None:
+                    self.counters.add('coalesced_across_workers')
+                    return result
+            return compute()
+        finally:
+            if lock_fd is not None:
+                os.close(lock_fd)
+
+    def _acquire_file_lock(self, key):
+        """
+        Lock one of 256 lock files chosen by the key's hash.
+        Returns the locked file descriptor, or None if the lock could not be
+        taken within the timeout (the caller then proceeds without it).
+        """
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        path = os.path.join(self.lock_dir, digest[:2] + '.lock')
+        lock_fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_fd
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    self.counters.add('timeouts')
+                    os.close(lock_fd)
+                    return None
+                time.sleep(0.01)
+
+    def stats(self):
+        """Return the coalescing counters shared across all workers."""
+        stats = self.counters.snapshot()
+        stats['in_flight'] = len(self._calls)
+        return stats
@@ -0,0 +1,22 @@
+# gunicorn.conf.py
+# Gunicorn settings for the Discover India application
+# Gunicorn loads this file automatically when started from the project folder
+# (e.g. `gunicorn app:app`). Threaded workers are used so the admission
+# control in app.py can see how many requests each worker is handling:
+# a sync worker only ever has one request in flight, so it could only shed
+# load from the X-Request-Start header, which needs a front proxy that sets it.
+
+import os
+
+# Threaded workers: each worker process serves several requests at once
+worker_class = 'gthread'
+
+# Worker processes (Render and Heroku set WEB_CONCURRENCY)
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Threads per worker; keep this above ADMISSION_MAX_IN_FLIGHT so the extra
+# threads can answer cheap requests and fast 503s while full renders are busy
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Seconds before a stuck worker is restarted
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
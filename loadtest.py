@@ -0,0 +1,103 @@
+# loadtest.py
+# Simple closed-loop load test for the Discover India application
+# Each client thread sends requests back-to-back for a fixed duration, then
+# the script reports throughput and latency percentiles per response status.
+#
+# Example - measure at normal load, then at 5x the concurrency:
+#   python loadtest.py http://127.0.0.1:8000 --concurrency 4
+#   python loadtest.py http://127.0.0.1:8000 --concurrency 20
+
+import argparse
+import http.client
+import itertools
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Mix of cheap (cached pages, static files) and expensive (streamed XML) requests
+DEFAULT_PATHS = [
+    '/',
+    '/culture',
+    '/details/Holi',
+    '/static/css/style.css',
+    '/static/js/main.js',
+    '/sitemap.xml',
+    '/feed.atom',
+]
+
+
+def percentile(values, fraction):
+    """Return the value at the given fraction (0-1) of a list of numbers"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(int(len(values) * fraction), len(values) - 1)
+    return values[index]
+
+
+def run_client(base, paths, host_header, deadline, results, lock):
+    """One client thread: send requests over a keep-alive connection until the deadline"""
+    connection = None
+    local = []
+    for path in itertools.cycle(paths):
+        if time.monotonic() >= deadline:
+            break
+        if connection is None:
+            connection = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+        headers = {'Host': host_header} if host_header else {}
+        started = time.monotonic()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = 'error'
+            connection.close()
+            connection = None
+        local.append((status, time.monotonic() - started))
+    if connection is not None:
+        connection.close()
+    with lock:
+        results.extend(local)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Closed-loop load test for the Discover India site.')
+    parser.add_argument('url', help='Base URL of a running server, e.g. http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=4, help='Number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=15, help='Test length in seconds')
+    parser.add_argument('--host', help='Host header to send (defaults to the URL host)')
+    parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable)')
+    args = parser.parse_args()
+
+    base = urlsplit(args.url)
+    paths = args.paths or DEFAULT_PATHS
+    results = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    threads = [
+        threading.Thread(target=run_client, args=(base, paths, args.host, deadline, results, lock))
+        for _ in range(args.concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    # Report overall numbers, then a breakdown by status code
+    latencies = [latency for _, latency in results]
+    print('concurrency=%d duration=%.1fs requests=%d throughput=%.1f req/s' % (
+        args.concurrency, elapsed, len(results), len(results) / elapsed))
+    print('all     p50=%7.1fms p99=%7.1fms' % (percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000))
+    for status in sorted({status for status, _ in results}, key=str):
+        subset = [latency for code, latency in results if code == status]
+        print('%-7s p50=%7.1fms p99=%7.1fms count=%d' % (
+            status, percentile(subset, 0.5) * 1000, percentile(subset, 0.99) * 1000, len(subset)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+# profiling.py
+# On-demand request profiling for the Discover India application
+# A request is only profiled when it carries a valid signed token or is picked
+# by the sampling rate. Each capture is saved as a cProfile dump, a text
+# summary, a collapsed-stack file and an SVG flamegraph under one capture id.
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from urllib.parse import parse_qs
+from xml.sax.saxutils import escape as xml_escape
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+
+# Files written for every capture, keyed by the kind used in download URLs
+CAPTURE_FILES = {
+    'prof': 'application/octet-stream',
+    'txt': 'text/plain',
+    'collapsed': 'text/plain',
+    'svg': 'image/svg+xml',
+}
+
+# Capture ids start with the X-Request-ID header, so only allow safe characters
+_SAFE_ID = re.compile(r'[^A-Za-z0-9_-]')
+
+# Query parameter that carries a profiling token (the X-Profile-Token header also works)
+TOKEN_PARAM = '_profile'
+
+# Set in the WSGI environ of a request that is being profiled, so the app can
+# skip its page cache and the capture shows the real view code
+PROFILING_ENVIRON_KEY = 'discover_india.profiling'
+
+
+# Profile Tokens
+# ==============
+
+def make_serializer(secret):
+    """Serializer used to sign and check profiling tokens"""
+    return URLSafeTimedSerializer(secret, salt='request-profile')
+
+
+def issue_token(secret):
+    """Create a signed token that enables profiling until it expires"""
+    return make_serializer(secret).dumps('profile')
+
+
+def check_token(secret, token, max_age):
+    """Return True if token was signed with secret and is younger than max_age seconds"""
+    if not secret or not token:
+        return False
+    try:
+        return make_serializer(secret).loads(token, max_age=max_age) == 'profile'
+    except BadSignature:
+        return False
+
+
+# Stack Sampling
+# ==============
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+    The samples are counted as collapsed stacks ("outer;inner;leaf" -> count),
+    the format used by flamegraph tools.
+    """
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append('%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+                frame = frame.f_back
+            # Outermost frame first; semicolons separate frames in the collapsed format
+            stack = ';'.join(name.replace(';', ',') for name in reversed(names))
+            self.counts[stack] = self.counts.get(stack, 0) + 1
+
+
+def render_flamegraph(counts, width=1200, row_height=18):
+    """
+    Render collapsed stack counts as a simple SVG flamegraph.
+    Each box is a function; its width is the share of samples it appeared in.
+    """
+    total = sum(counts.values())
+    if not total:
+        return '<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d"></svg>' % (width, row_height)
+
+    # Build a tree of {name: [count, children]}
+    root = {}
+    for stack, count in counts.items():
+        level = root
+        for name in stack.split(';'):
+            node = level.setdefault(name, [0, {}])
+            node[0] += count
+            level = node[1]
+
+    boxes = []
+
+    def layout(level, x, depth):
+        for name, (count, children) in sorted(level.items()):
+            box_width = width * count / total
+            boxes.append((x, depth, box_width, name, count))
+            layout(children, x, depth + 1)
+            x += box_width
+
+    layout(root, 0.0, 0)
+    depth = max(box[1] for box in boxes) + 1
+    height = depth * row_height
+
+    parts = ['<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d" font-family="monospace" font-size="11">'
+             % (width, height)]
+    for x, level, box_width, name, count in boxes:
+        # Draw the root at the bottom like a traditional flamegraph
+        y = height - (level + 1) * row_height
+        hue = 20 + (zlib.crc32(name.encode('utf-8')) % 40)
+        label = xml_escape(name)
+        parts.append(
+            '<g><title>%s (%d samples, %.1f%%)</title>'
+            '<rect x="%.1f" y="%d" width="%.1f" height="%d" fill="hsl(%d,90%%,60%%)" stroke="white"/>'
+            % (label, count, 100.0 * count / total, x, y, box_width, row_height - 1, hue))
+        # Only label boxes wide enough to hold some text
+        if box_width > 40:
+            max_chars = int(box_width / 7)
+            parts.append('<text x="%.1f" y="%d">%s</text>' % (x + 3, y + row_height - 5, xml_escape(name[:max_chars])))
+        parts.append('</g>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+# Capture Storage
+# ===============
+
+class ProfileStore:
+    """
+    Directory of saved captures. Only the newest `keep` captures are kept.
+    """
+
+    def __init__(self, directory, keep=50):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, capture_id, kind):
+        """Path of one file belonging to a capture"""
+        return os.path.join(self.directory, '%s.%s' % (capture_id, kind))
+
+    def save(self, capture_id, profiler, counts, meta):
+        """Write every file for a capture, then prune old captures"""
+        profiler.dump_stats(self.path(capture_id, 'prof'))
+
+        # Human readable summary of the slowest functions
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+        with open(self.path(capture_id, 'txt'), 'w') as summary_file:
+            summary_file.write(summary.getvalue())
+
+        with open(self.path(capture_id, 'collapsed'), 'w') as collapsed_file:
+            for stack, count in sorted(counts.items()):
+                collapsed_file.write('%s %d\n' % (stack, count))
+
+        with open(self.path(capture_id, 'svg'), 'w') as svg_file:
+            svg_file.write(render_flamegraph(counts))
+
+        # Metadata is written last so listings only show complete captures
+        with open(self.path(capture_id, 'json'), 'w') as meta_file:
+            json.dump(meta, meta_file)
+
+        self.prune()
+
+    def list(self):
+        """Return metadata for the saved captures, newest first"""
+        captures = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as meta_file:
+                    captures.append(json.load(meta_file))
+            except (OSError, ValueError):
+                continue
+        captures.sort(key=lambda capture: capture['started'], reverse=True)
+        return captures
+
+    def prune(self):
+        """Delete captures beyond the newest `keep`"""
+        for capture in self.list()[self.keep:]:
+            for kind in list(CAPTURE_FILES) + ['json']:
+                try:
+                    os.unlink(self.path(capture['id'], kind))
+                except FileNotFoundError:
+                    pass
+
+
+# Profiling Middleware
+# ====================
+
+class ProfilingMiddleware:
+    """
+    WSGI middleware that profiles selected requests.
+
+    A request is profiled when it sends a valid token in the X-Profile-Token
+    header or the TOKEN_PARAM query parameter, or when it is picked at random
+    according to sample_rate. Everything else passes straight through.
+    Paths starting with one of skip_prefixes (the capture browser itself) are
+    never profiled. Only one request per worker is profiled at a time.
+    """
+
+    def __init__(self, wsgi_app, store, secret=None, sample_rate=0.0, token_max_age=3600, skip_prefixes=()):
+        self.wsgi_app = wsgi_app
+        self.store = store
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.token_max_age = token_max_age
+        self.skip_prefixes = tuple(skip_prefixes)
+        self._busy = threading.Lock()
+
+    def _should_profile(self, environ):
+        if self.skip_prefixes and environ.get('PATH_INFO', '').startswith(self.skip_prefixes):
+            return False
+        token = environ.get('HTTP_X_PROFILE_TOKEN')
+        if token is None and TOKEN_PARAM + '=' in environ.get('QUERY_STRING', ''):
+            token = parse_qs(environ['QUERY_STRING']).get(TOKEN_PARAM, [None])[0]
+        if token is not None:
+            return check_token(self.secret, token, self.token_max_age)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, environ, start_response):
+        if not self._should_profile(environ) or not self._busy.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+
+        try:
+            # The request id makes captures easy to match with logs; the random
+            # suffix stops a client from overwriting an existing capture
+            request_id = _SAFE_ID.sub('', environ.get('HTTP_X_REQUEST_ID', ''))[:64]
+            capture_id = '%s-%s' % (request_id, uuid.uuid4().hex[:8]) if request_id else uuid.uuid4().hex[:16]
+            environ[PROFILING_ENVIRON_KEY] = True
+            status_holder = []
+
+            def capture_start_response(status, headers, exc_info=None):
+                # Tell the client where to find the capture
+                status_holder.append(status)
+                headers = list(headers) + [('X-Profile-Id', capture_id)]
+                return start_response(status, headers, exc_info)
+
+            profiler = cProfile.Profile()
+            sampler = StackSampler(threading.get_ident())
+            started = time.time()
+            sampler.start()
+            profiler.enable()
+            try:
+                # Read the whole body while profiling so lazy responses are included
+                app_iter = self.wsgi_app(environ, capture_start_response)
+                try:
+                    body = list(app_iter)
+                finally:
+                    if hasattr(app_iter, 'close'):
+                        app_iter.close()
+            finally:
+                profiler.disable()
+                sampler.stop()
+
+            meta = {
+                'id': capture_id,
+                'method': environ.get('REQUEST_METHOD'),
+                'path': environ.get('PATH_INFO'),
+                'status': status_holder[0] if status_holder else None,
+                'started': started,
+                'duration_ms': round((time.time() - started) * 1000, 2),
+                'samples': sum(sampler.counts.values()),
+            }
+            self.store.save(capture_id, profiler, sampler.counts, meta)
+            return body
+        finally:
+            self._busy.release()
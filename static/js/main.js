@@ -8,6 +8,17 @@
   }
 })();
 
+// --- My Service Worker Registration ---
+// The service worker caches pages and images so repeat visits load faster
+// and the site still works offline
+if ("serviceWorker" in navigator && document.body.dataset.swUrl) {
+  window.addEventListener("load", () => {
+    navigator.serviceWorker
+      .register(document.body.dataset.swUrl)
+      .catch((error) => console.warn("Service worker registration failed:", error));
+  });
+}
+
 // --- My Theme Switcher Toggle Logic ---
 // I'm putting this logic outside the DOMContentLoaded so it runs right away
 const themeToggleBtn = document.querySelector(".theme-toggle-btn");
@@ -0,0 +1,163 @@
+# static_server.py
+# Fast static file serving for the Discover India application
+# The static/ folder is indexed once at startup. Small files are kept in
+# memory with their headers prepared in advance, large files are handed to
+# the server's wsgi.file_wrapper (gunicorn uses sendfile for zero-copy), and
+# Range, HEAD and conditional requests are answered without touching Flask.
+
+import hashlib
+import mimetypes
+import os
+from datetime import datetime, timezone
+
+from werkzeug.http import http_date, is_resource_modified, parse_range_header
+
+# Chunk size used when streaming part of a large file
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFile:
+    """Everything needed to serve one static file, worked out at startup"""
+
+    def __init__(self, path, stat, cache_control, data=None):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+        self.data = data
+
+        # Files held in memory get a content hash; large files use size and mtime
+        if data is not None:
+            self.etag = hashlib.sha1(data).hexdigest()
+        else:
+            self.etag = '%x-%x' % (stat.st_mtime_ns, stat.st_size)
+
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml'):
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+        self.last_modified = http_date(self.mtime)
+
+        # Headers shared by every response for this file
+        self.headers = (
+            ('Content-Type', self.content_type),
+            ('ETag', '"%s"' % self.etag),
+            ('Last-Modified', self.last_modified),
+            ('Cache-Control', cache_control),
+            ('Accept-Ranges', 'bytes'),
+        )
+
+
+def _read_range(path, start, stop):
+    """Yield the bytes of path between start and stop in chunks"""
+    with open(path, 'rb') as static_file:
+        static_file.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = static_file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class StaticFiles:
+    """
+    WSGI middleware that serves files under url_prefix from directory.
+
+    Paths that are not in the startup index (for example files added while
+    the app is running) fall through to the wrapped Flask app, which serves
+    them the usual way.
+    """
+
+    def __init__(self, wsgi_app, directory, url_prefix='/static', max_age=None,
+                 memory_file_limit=256 * 1024, memory_budget=32 * 1024 * 1024):
+        self.wsgi_app = wsgi_app
+        self.directory = os.path.abspath(directory)
+        self.url_prefix = url_prefix.rstrip('/') + '/'
+        self.memory_file_limit = memory_file_limit
+        self.memory_budget = memory_budget
+        self.cache_control = 'public, max-age=%d' % max_age if max_age else 'no-cache'
+        self.files = {}
+        self.memory_bytes = 0
+        self.index()
+
+    def index(self):
+        """Scan the static directory and load the hot set into memory"""
+        stats = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                stats.append((os.stat(path), path))
+
+        files = {}
+        memory_bytes = 0
+        # Smallest files first, so the memory budget holds as many files as possible
+        for stat, path in sorted(stats, key=lambda item: item[0].st_size):
+            data = None
+            if stat.st_size <= self.memory_file_limit and memory_bytes + stat.st_size <= self.memory_budget:
+                with open(path, 'rb') as static_file:
+                    data = static_file.read()
+                memory_bytes += len(data)
+            url_path = os.path.relpath(path, self.directory).replace(os.sep, '/')
+            files[url_path] = StaticFile(path, stat, self.cache_control, data)
+
+        self.files = files
+        self.memory_bytes = memory_bytes
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD')
+        if not path.startswith(self.url_prefix) or method not in ('GET', 'HEAD'):
+            return self.wsgi_app(environ, start_response)
+
+        static_file = self.files.get(path[len(self.url_prefix):])
+        if static_file is None:
+            return self.wsgi_app(environ, start_response)
+
+        headers = list(static_file.headers)
+
+        # Answer If-None-Match / If-Modified-Since with 304 Not Modified
+        if not is_resource_modified(environ, etag=static_file.etag, last_modified=static_file.mtime,
+                                    ignore_if_range=True):
+            start_response('304 Not Modified', headers)
+            return []
+
+        # Work out the byte range to send (the whole file unless a single valid range was asked for)
+        status = '200 OK'
+        start, stop = 0, static_file.size
+        byte_range = parse_range_header(environ.get('HTTP_RANGE'))
+        # If-Range: only honour the range if the client's partial copy is still current
+        range_allowed = 'HTTP_IF_RANGE' not in environ or not is_resource_modified(
+            environ, etag=static_file.etag, last_modified=static_file.mtime, ignore_if_range=False)
+        if (byte_range is not None and byte_range.units == 'bytes' and len(byte_range.ranges) == 1
+                and range_allowed):
+            requested = byte_range.range_for_length(static_file.size)
+            if requested is None:
+                headers.append(('Content-Range', 'bytes */%d' % static_file.size))
+                headers.append(('Content-Length', '0'))
+                start_response('416 Range Not Satisfiable', headers)
+                return []
+            start, stop = requested
+            status = '206 Partial Content'
+            headers.append(('Content-Range', 'bytes %d-%d/%d' % (start, stop - 1, static_file.size)))
+
+        headers.append(('Content-Length', str(stop - start)))
+        start_response(status, headers)
+
+        if method == 'HEAD':
+            return []
+        if static_file.data is not None:
+            return [static_file.data[start:stop]]
+        if start == 0 and stop == static_file.size and 'wsgi.file_wrapper' in environ:
+            # Whole large file: let the server use sendfile where it can
+            return environ['wsgi.file_wrapper'](open(static_file.path, 'rb'), CHUNK_SIZE)
+        return _read_range(static_file.path, start, stop)
+
+    def stats(self):
+        """Return the size of the index and of the in-memory hot set"""
+        return {
+            'files': len(self.files),
+            'memory_files': sum(1 for static_file in self.files.values() if static_file.data is not None),
+            'memory_bytes': self.memory_bytes,
+        }
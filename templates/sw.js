@@ -0,0 +1,155 @@
+// Service worker for Discover India
+// Generated by the service_worker() route in app.py - do not edit the output directly.
+// Every value below is filled in on the server, and VERSION changes whenever
+// the static assets or the site content change, so a new worker (with fresh
+// caches) is installed and the old caches are removed in one step.
+// Asset caches only follow ASSET_VERSION so content edits keep cached images.
+
+const VERSION = {{ version | tojson }};
+const ASSET_VERSION = {{ asset_version | tojson }};
+const STATIC_CACHE = "static-" + ASSET_VERSION;
+const PAGE_CACHE = "pages-" + VERSION;
+const IMAGE_CACHE = "images-" + ASSET_VERSION;
+const IMAGE_CACHE_MAX_ENTRIES = {{ image_cache_max_entries | tojson }};
+
+// Assets and pages downloaded while the worker installs
+const PRECACHE_ASSETS = {{ precache_assets | tojson }};
+const PRECACHE_PAGES = {{ precache_pages | tojson }};
+
+const STATIC_PREFIX = {{ static_prefix | tojson }};
+const OFFLINE_PAGE = {{ offline_page | tojson }};
+
+// Download only the assets this cache does not already hold. A content edit
+// installs a new worker, but STATIC_CACHE keeps its name until ASSET_VERSION
+// changes, so the stylesheet, script and hero images are not downloaded again.
+function addMissing(cache, urls) {
+  return Promise.all(
+    urls.map((url) =>
+      cache.match(url).then((cached) => (cached ? undefined : cache.add(url)))
+    )
+  );
+}
+
+// --- Install: download everything for this version before taking over ---
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    Promise.all([
+      caches.open(STATIC_CACHE).then((cache) => addMissing(cache, PRECACHE_ASSETS)),
+      caches.open(PAGE_CACHE).then((cache) => cache.addAll(PRECACHE_PAGES)),
+    ]).then(() => self.skipWaiting())
+  );
+});
+
+// --- Activate: delete caches from older versions ---
+self.addEventListener("activate", (event) => {
+  const current = [STATIC_CACHE, PAGE_CACHE, IMAGE_CACHE];
+  event.waitUntil(
+    caches
+      .keys()
+      .then((names) =>
+        Promise.all(
+          names
+            .filter((name) => !current.includes(name))
+            .map((name) => caches.delete(name))
+        )
+      )
+      .then(() => self.clients.claim())
+  );
+});
+
+// Cache-first: use the cached copy, fetch and store it if missing
+function cacheFirst(request, cacheName) {
+  return caches.open(cacheName).then((cache) =>
+    cache.match(request).then(
+      (cached) =>
+        cached ||
+        fetch(request).then((response) => {
+          if (response.ok) {
+            cache.put(request, response.clone());
+          }
+          return response;
+        })
+    )
+  );
+}
+
+// Remove the oldest images once the image cache holds too many entries
+function trimImageCache(cache) {
+  return cache.keys().then((keys) => {
+    const extra = keys.length - IMAGE_CACHE_MAX_ENTRIES;
+    return Promise.all(keys.slice(0, Math.max(extra, 0)).map((key) => cache.delete(key)));
+  });
+}
+
+// Cache-first with LRU order: a hit is re-inserted so it becomes the newest entry
+function cachedImage(request) {
+  return caches.open(IMAGE_CACHE).then((cache) =>
+    cache.match(request).then((cached) => {
+      if (cached) {
+        // Clone now: once cached is returned its body is being read
+        const copy = cached.clone();
+        cache
+          .delete(request)
+          .then(() => cache.put(request, copy))
+          .catch(() => {});
+        return cached;
+      }
+      return fetch(request).then((response) => {
+        if (response.ok) {
+          cache
+            .put(request, response.clone())
+            .then(() => trimImageCache(cache))
+            .catch(() => {});
+        }
+        return response;
+      });
+    })
+  );
+}
+
+// Stale-while-revalidate: answer from cache straight away and refresh it in the background
+function staleWhileRevalidate(event) {
+  const request = event.request;
+  return caches.open(PAGE_CACHE).then((cache) =>
+    cache.match(request).then((cached) => {
+      const network = fetch(request)
+        .then((response) => {
+          if (response.ok) {
+            cache.put(request, response.clone());
+          }
+          return response;
+        })
+        .catch(() => cached || cache.match(OFFLINE_PAGE));
+      if (cached) {
+        event.waitUntil(network);
+        return cached;
+      }
+      return network;
+    })
+  );
+}
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+
+  // Only handle GET requests to this site
+  if (request.method !== "GET" || url.origin !== self.location.origin) {
+    return;
+  }
+
+  if (url.pathname.startsWith(STATIC_PREFIX)) {
+    if (PRECACHE_ASSETS.includes(url.pathname)) {
+      // Stylesheet, script and hero images
+      event.respondWith(cacheFirst(request, STATIC_CACHE));
+    } else if (request.destination === "image") {
+      // All other images share a size-limited cache
+      event.respondWith(cachedImage(request));
+    }
+    return;
+  }
+
+  if (request.mode === "navigate" || PRECACHE_PAGES.includes(url.pathname)) {
+    event.respondWith(staleWhileRevalidate(event));
+  }
+});